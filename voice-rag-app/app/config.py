@@ -0,0 +1,58 @@
+# app/config.py
+import os
+
+# Main LLM used for answers and summaries
+LLM_MODEL_NAME = os.getenv("LLM_MODEL_NAME", "meta-llama/Llama-2-7b-chat-hf")
+
+# Small draft model for assisted (speculative) decoding.
+# Must share the main model's tokenizer; set to an empty string to disable.
+DRAFT_MODEL_NAME = os.getenv("DRAFT_MODEL_NAME", "TinyLlama/TinyLlama-1.1B-Chat-v1.0")
+
+# Generation limits per endpoint
+# max_new_tokens: hard token cap, max_sentences: stop once this many sentences are generated
+GENERATION_PROFILES = {
+    "answer": {
+        "max_new_tokens": int(os.getenv("ANSWER_MAX_NEW_TOKENS", "160")),
+        "max_sentences": int(os.getenv("ANSWER_MAX_SENTENCES", "4")),
+    },
+    "summary": {
+        "max_new_tokens": int(os.getenv("SUMMARY_MAX_NEW_TOKENS", "512")),
+        "max_sentences": None,
+    },
+}
+
+# Embedding model shared by PDF ingestion and query embedding
+EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL_NAME", "all-MiniLM-L6-v2")
+
+# Runtime for the embedding model: "torch", "onnx" or "onnx-int8" (CPU)
+# The ONNX runtimes need sentence-transformers[onnx]>=3.2; falls back to torch (see load_error in /embedding-stats)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+
+# Concurrent embedding calls arriving within this window are encoded together
+EMBEDDING_BATCH_WINDOW_MS = float(os.getenv("EMBEDDING_BATCH_WINDOW_MS", "5"))
+EMBEDDING_MAX_BATCH_SIZE = int(os.getenv("EMBEDDING_MAX_BATCH_SIZE", "64"))
+
+# Number of recent query vectors kept in the LRU cache
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "1024"))
+
+# Unix socket of the shared model server (python -m app.model_server).
+# Empty means every API worker loads the models in-process.
+MODEL_SERVER_ADDRESS = os.getenv("MODEL_SERVER_ADDRESS", "")
+# Shared secret between the model server and API workers. There is no default:
+# authenticated peers can send arbitrary pickles, so the server and client refuse to run without it.
+MODEL_SERVER_AUTHKEY = os.getenv("MODEL_SERVER_AUTHKEY", "").encode()
+
+# Models can be split across several servers with MODEL_SERVER_ADDRESS_<MODEL>
+MODEL_NAMES = ["embedding", "rag", "summarizer", "speech"]
+MODEL_SERVER_ADDRESSES = {
+    model: os.getenv(f"MODEL_SERVER_ADDRESS_{model.upper()}", MODEL_SERVER_ADDRESS)
+    for model in MODEL_NAMES
+}
+
+# Per-model request queue capacity (requests beyond it are rejected) and worker threads.
+# Embedding gets several workers so concurrent calls land in the same batch.
+MODEL_QUEUE_SIZES = {"embedding": 256, "rag": 8, "summarizer": 4, "speech": 16}
+MODEL_WORKERS = {"embedding": 8, "rag": 1, "summarizer": 1, "speech": 1}
+
+# Arrays at least this large are passed through shared memory instead of the socket
+SHARED_MEMORY_MIN_BYTES = int(os.getenv("SHARED_MEMORY_MIN_BYTES", str(64 * 1024)))
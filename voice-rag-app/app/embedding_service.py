@@ -0,0 +1,239 @@
+# app/embedding_service.py
+import time
+import queue
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+import numpy as np
+from sentence_transformers import SentenceTransformer
+
+from app.config import (
+    EMBEDDING_MODEL_NAME,
+    EMBEDDING_BACKEND,
+    EMBEDDING_BATCH_WINDOW_MS,
+    EMBEDDING_MAX_BATCH_SIZE,
+    EMBEDDING_CACHE_SIZE,
+)
+
+# Pre-exported ONNX files shipped in the sentence-transformers MiniLM hub repo
+ONNX_INT8_FILE = "onnx/model_qint8_avx2.onnx"
+
+
+def load_embedding_model(model_name, backend):
+    """Load a SentenceTransformer on the torch, onnx or onnx-int8 runtime"""
+    if backend == "onnx":
+        return SentenceTransformer(model_name, device="cpu", backend="onnx")
+    if backend == "onnx-int8":
+        return SentenceTransformer(
+            model_name,
+            device="cpu",
+            backend="onnx",
+            model_kwargs={"file_name": ONNX_INT8_FILE}
+        )
+    return SentenceTransformer(model_name)
+
+
+class EmbeddingStats:
+    """Throughput and latency of the embedding service"""
+
+    def __init__(self, window=1000):
+        self.lock = threading.Lock()
+        # Query and document latencies are kept apart, a large PDF would otherwise swamp the query p99
+        self.latencies = {"query": deque(maxlen=window), "documents": deque(maxlen=window)}
+        self.texts = 0
+        self.batches = 0
+        self.encode_seconds = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def record_batch(self, num_texts, elapsed):
+        with self.lock:
+            self.texts += num_texts
+            self.batches += 1
+            self.encode_seconds += elapsed
+
+    def record_latency(self, kind, elapsed):
+        with self.lock:
+            self.latencies[kind].append(elapsed)
+
+    def record_cache(self, hit):
+        with self.lock:
+            if hit:
+                self.cache_hits += 1
+            else:
+                self.cache_misses += 1
+
+    def summary(self):
+        with self.lock:
+            summary = {
+                "texts": self.texts,
+                "batches": self.batches,
+                "avg_batch_size": round(self.texts / self.batches, 2) if self.batches else 0.0,
+                "texts_per_sec": round(self.texts / self.encode_seconds, 2) if self.encode_seconds else 0.0,
+                "cache_hits": self.cache_hits,
+                "cache_misses": self.cache_misses,
+            }
+            for kind, samples in self.latencies.items():
+                latencies = np.array(samples) * 1000.0
+                summary[f"{kind}_p50_latency_ms"] = round(float(np.percentile(latencies, 50)), 2) if len(latencies) else None
+                summary[f"{kind}_p99_latency_ms"] = round(float(np.percentile(latencies, 99)), 2) if len(latencies) else None
+            return summary
+
+
+class EmbeddingService:
+    """
+    Shared embedding model for queries and document chunks:
+    - concurrent calls are merged into one encode within a short window
+    - recent query vectors are kept in an LRU cache
+    - the model can run on torch or on an ONNX / int8 ONNX CPU runtime
+    """
+
+    def __init__(
+        self,
+        model_name=EMBEDDING_MODEL_NAME,
+        backend=EMBEDDING_BACKEND,
+        batch_window_ms=EMBEDDING_BATCH_WINDOW_MS,
+        max_batch_size=EMBEDDING_MAX_BATCH_SIZE,
+        cache_size=EMBEDDING_CACHE_SIZE
+    ):
+        self.load_error = None
+        try:
+            self.model = load_embedding_model(model_name, backend)
+            self.backend = backend
+        except Exception as e:
+            print(f"Could not load {backend} embedding backend, using torch: {str(e)}")
+            self.model = SentenceTransformer(model_name)
+            self.backend = "torch"
+            self.load_error = str(e)
+
+        self.batch_window = batch_window_ms / 1000.0
+        self.max_batch_size = max_batch_size
+        self.stats = EmbeddingStats()
+
+        # LRU cache of query vectors
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.cache_lock = threading.Lock()
+
+        # Background worker that batches pending requests
+        self.requests = queue.Queue()
+        self.worker = threading.Thread(target=self._run, daemon=True)
+        self.worker.start()
+
+    def _run(self):
+        while True:
+            # Wait for the first request, then gather more until the window closes
+            batch = [self.requests.get()]
+            num_texts = len(batch[0][0])
+            deadline = time.perf_counter() + self.batch_window
+            while num_texts < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    request = self.requests.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(request)
+                num_texts += len(request[0])
+
+            texts = [text for request_texts, _ in batch for text in request_texts]
+            try:
+                start = time.perf_counter()
+                embeddings = self.model.encode(texts, batch_size=self.max_batch_size)
+                self.stats.record_batch(len(texts), time.perf_counter() - start)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            # Hand each caller back a copy of its own rows, not a view that keeps the whole batch alive
+            offset = 0
+            for request_texts, future in batch:
+                future.set_result(embeddings[offset:offset + len(request_texts)].copy())
+                offset += len(request_texts)
+
+    def _encode(self, texts):
+        """Queue texts for the next batch and wait for their embeddings"""
+        future = Future()
+        self.requests.put((list(texts), future))
+        return future.result()
+
+    def embed_query(self, query):
+        """Create embedding for a single query, served from the LRU cache when possible"""
+        with self.cache_lock:
+            if query in self.cache:
+                self.cache.move_to_end(query)
+                self.stats.record_cache(hit=True)
+                return self.cache[query]
+        self.stats.record_cache(hit=False)
+
+        start = time.perf_counter()
+        embedding = self._encode([query])[0]
+        self.stats.record_latency("query", time.perf_counter() - start)
+
+        # Cached vectors are shared between callers, so make them read-only
+        embedding.setflags(write=False)
+
+        with self.cache_lock:
+            self.cache[query] = embedding
+            self.cache.move_to_end(query)
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+
+        return embedding
+
+    def embed_documents(self, texts):
+        """Create embeddings for a list of document chunks"""
+        if not texts:
+            return np.empty((0, self.model.get_sentence_embedding_dimension()), dtype=np.float32)
+
+        # Submit one batch-sized slice at a time so queued queries are encoded in between
+        start = time.perf_counter()
+        embeddings = np.concatenate([
+            self._encode(texts[i:i + self.max_batch_size])
+            for i in range(0, len(texts), self.max_batch_size)
+        ])
+        self.stats.record_latency("documents", time.perf_counter() - start)
+        return embeddings
+
+    def summary(self):
+        """Backend name plus throughput, latency and cache stats"""
+        return {"backend": self.backend, "load_error": self.load_error, **self.stats.summary()}
+
+
+def benchmark_backends(texts, backends=("torch", "onnx", "onnx-int8"), concurrency=8, rounds=20):
+    """Embed texts from concurrent callers on each backend and report throughput and latency"""
+    results = {}
+    for backend in backends:
+        service = EmbeddingService(backend=backend, cache_size=0)
+        if service.backend != backend:
+            # Report the backend as skipped rather than benchmarking the torch fallback
+            results[backend] = {"backend": backend, "skipped": service.load_error}
+            continue
+
+        def worker():
+            for i in range(rounds):
+                # Vary the text so the LRU cache does not hide encode cost
+                service.embed_query(f"{texts[i % len(texts)]} {i}")
+
+        threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        results[backend] = service.summary()
+    return results
+
+
+# Compare backends from the command line
+if __name__ == "__main__":
+    sample_queries = [
+        "What is the main finding of the document?",
+        "Summarize the methodology section.",
+        "Which datasets were used in the experiments?",
+        "What are the limitations mentioned by the authors?",
+    ]
+    for backend, stats in benchmark_backends(sample_queries).items():
+        print(backend, stats)
@@ -0,0 +1,201 @@
+# app/generation.py
+import re
+import time
+import threading
+from functools import lru_cache
+import torch
+from transformers import AutoTokenizer, AutoModelForCausalLM, StoppingCriteria, StoppingCriteriaList
+
+from app.config import GENERATION_PROFILES
+
+# Word followed by a sentence terminator, optional closing quotes or brackets, then whitespace (or end of text)
+SENTENCE_END = re.compile(r"(\S*?)[.!?][\"')\]]*(?=\s|$)")
+
+# Periods after these words do not end a sentence when a lowercase word follows ("e.g. apples")
+ABBREVIATIONS = {"e.g", "i.e", "etc", "vs", "cf", "fig", "approx", "dr", "mr", "mrs", "ms", "prof"}
+
+
+def sentence_ends(text):
+    """Offsets where sentences end, ignoring list markers ("1. ") and abbreviations ("e.g. ")"""
+    ends = []
+    for match in SENTENCE_END.finditer(text):
+        if text[match.start(1) + len(match.group(1))] == ".":
+            word = match.group(1).lstrip("([\"'").lower()
+            line_start = text.rfind("\n", 0, match.start()) + 1
+            if word.isdigit() and not text[line_start:match.start()].strip():
+                continue
+            next_word = text[match.end():].lstrip()
+            if word in ABBREVIATIONS and (not next_word or next_word[0].islower()):
+                continue
+            if len(word) == 1 and word.isalpha():
+                continue
+        ends.append(match.end())
+    return ends
+
+
+def truncate_sentences(text, max_sentences):
+    """Cut text after the given number of sentences"""
+    ends = sentence_ends(text)
+    if len(ends) >= max_sentences:
+        return text[:ends[max_sentences - 1]]
+    return text
+
+
+@lru_cache(maxsize=None)
+def load_draft_model(draft_model_name, device):
+    """Load the draft model once per process, generators on the same device share it"""
+    return AutoModelForCausalLM.from_pretrained(
+        draft_model_name,
+        torch_dtype=torch.float16 if device == "cuda" else torch.float32,
+    ).to(device)
+
+
+def load_generator(model_name, draft_model_name=None, device="cuda" if torch.cuda.is_available() else "cpu"):
+    """Load the LLM and wrap it in a Generator, RAGEngine and Summarizer can share the result"""
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModelForCausalLM.from_pretrained(
+        model_name,
+        torch_dtype=torch.float16 if device == "cuda" else torch.float32,
+        device_map="auto"
+    )
+    return Generator(model, tokenizer, device, draft_model_name)
+
+
+class SentenceStoppingCriteria(StoppingCriteria):
+    """Stop generation once enough complete sentences have been produced"""
+
+    def __init__(self, tokenizer, prompt_length, max_sentences):
+        self.tokenizer = tokenizer
+        self.prompt_length = prompt_length
+        self.max_sentences = max_sentences
+
+    def __call__(self, input_ids, scores, **kwargs):
+        text = self.tokenizer.decode(input_ids[0, self.prompt_length:], skip_special_tokens=True)
+        return len(sentence_ends(text)) >= self.max_sentences
+
+
+class GenerationStats:
+    """Running decode statistics across requests"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.new_tokens = 0
+        self.decode_seconds = 0.0
+        self.drafted_tokens = 0
+        self.accepted_tokens = 0
+
+    def record(self, stats):
+        with self.lock:
+            self.requests += 1
+            self.new_tokens += stats["new_tokens"]
+            self.decode_seconds += stats["decode_seconds"]
+            self.drafted_tokens += stats["drafted_tokens"]
+            self.accepted_tokens += stats["accepted_tokens"]
+
+    def summary(self):
+        with self.lock:
+            return {
+                "requests": self.requests,
+                "new_tokens": self.new_tokens,
+                "decode_seconds": round(self.decode_seconds, 3),
+                "tokens_per_sec": round(self.new_tokens / self.decode_seconds, 2) if self.decode_seconds else 0.0,
+                "acceptance_rate": round(self.accepted_tokens / self.drafted_tokens, 3) if self.drafted_tokens else None,
+            }
+
+
+class Generator:
+    """
+    Wraps model.generate with:
+    - assisted (speculative) decoding through an optional small draft model
+    - per-endpoint stop criteria (token cap and sentence cap)
+    - a per-request token budget
+    - tokens/sec and draft acceptance rate reporting
+    """
+
+    def __init__(self, model, tokenizer, device, draft_model_name=None):
+        self.model = model
+        self.tokenizer = tokenizer
+        self.device = device
+        # Kept per profile so answers and summaries are reported separately on a shared generator
+        self.stats = {profile: GenerationStats() for profile in GENERATION_PROFILES}
+        self.lock = threading.Lock()
+
+        self.draft_model = None
+        if draft_model_name:
+            try:
+                self.draft_model = load_draft_model(draft_model_name, device)
+            except Exception as e:
+                print(f"Could not load draft model {draft_model_name}, using plain decoding: {str(e)}")
+
+        # Count forward passes to estimate how many drafted tokens were accepted.
+        # Counters are per thread because the draft model can be shared with other generators.
+        self._counts = threading.local()
+        self.model.register_forward_hook(self._count_target_call)
+        if self.draft_model is not None:
+            self.draft_model.register_forward_hook(self._count_draft_call)
+
+    def _count_target_call(self, module, inputs, output):
+        self._counts.target_calls = getattr(self._counts, "target_calls", 0) + 1
+
+    def _count_draft_call(self, module, inputs, output):
+        self._counts.draft_calls = getattr(self._counts, "draft_calls", 0) + 1
+
+    def generate(self, prompt, profile="answer", token_budget=None, temperature=0.7, top_p=0.95):
+        """Generate a completion for prompt, returns (text, stats)"""
+        limits = GENERATION_PROFILES[profile]
+        max_new_tokens = limits["max_new_tokens"]
+        if token_budget is not None:
+            max_new_tokens = min(max_new_tokens, token_budget)
+        max_sentences = limits["max_sentences"]
+
+        # Tokenize prompt
+        inputs = self.tokenizer(prompt, return_tensors="pt").to(self.device)
+        prompt_length = inputs["input_ids"].shape[1]
+
+        stopping_criteria = StoppingCriteriaList()
+        if max_sentences:
+            stopping_criteria.append(SentenceStoppingCriteria(self.tokenizer, prompt_length, max_sentences))
+
+        generate_kwargs = dict(
+            max_new_tokens=max_new_tokens,
+            temperature=temperature,
+            do_sample=True,
+            top_p=top_p,
+            stopping_criteria=stopping_criteria,
+        )
+        if self.draft_model is not None:
+            generate_kwargs["assistant_model"] = self.draft_model
+
+        # One generation at a time per model
+        with self.lock:
+            self._counts.target_calls = 0
+            self._counts.draft_calls = 0
+            start = time.perf_counter()
+            with torch.no_grad():
+                output = self.model.generate(**inputs, **generate_kwargs)
+            elapsed = time.perf_counter() - start
+            target_calls = self._counts.target_calls
+            draft_calls = self._counts.draft_calls
+
+        # Decode only the newly generated tokens
+        new_tokens = output[0, prompt_length:]
+        text = self.tokenizer.decode(new_tokens, skip_special_tokens=True).strip()
+        if max_sentences:
+            text = truncate_sentences(text, max_sentences)
+
+        # Every verification pass of the main model yields one token of its own,
+        # the rest of the new tokens were accepted from the draft
+        num_new_tokens = len(new_tokens)
+        accepted = max(num_new_tokens - target_calls, 0) if draft_calls else 0
+        stats = {
+            "new_tokens": num_new_tokens,
+            "decode_seconds": elapsed,
+            "tokens_per_sec": round(num_new_tokens / elapsed, 2) if elapsed else 0.0,
+            "drafted_tokens": draft_calls,
+            "accepted_tokens": accepted,
+            "acceptance_rate": round(accepted / draft_calls, 3) if draft_calls else None,
+        }
+        self.stats[profile].record(stats)
+
+        return text, stats
@@ -0,0 +1,89 @@
+# app/ipc.py
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+import numpy as np
+
+from app.config import SHARED_MEMORY_MIN_BYTES
+
+
+class ModelServerBusy(Exception):
+    """Raised when a model's request queue on the model server is full"""
+
+
+class SharedArray:
+    """Reference to a numpy array copied into a shared memory segment"""
+
+    def __init__(self, name, shape, dtype):
+        self.name = name
+        self.shape = shape
+        self.dtype = dtype
+
+
+def _to_shared(array):
+    shm = SharedMemory(create=True, size=array.nbytes)
+    np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[...] = array
+    # Ownership is handed over explicitly (see unpack and release), not left to the resource tracker
+    resource_tracker.unregister(shm._name, "shared_memory")
+    shm.close()
+    return SharedArray(shm.name, array.shape, array.dtype.str)
+
+
+def _from_shared(ref, unlink):
+    shm = SharedMemory(name=ref.name)
+    try:
+        return np.ndarray(ref.shape, dtype=np.dtype(ref.dtype), buffer=shm.buf).copy()
+    finally:
+        shm.close()
+        if unlink:
+            shm.unlink()
+        else:
+            # Attaching registered the segment, the sender still owns it
+            resource_tracker.unregister(shm._name, "shared_memory")
+
+
+def pack(obj):
+    """Replace large numpy arrays (and torch tensors) in obj with shared memory references"""
+    if hasattr(obj, "detach") and hasattr(obj, "numpy"):
+        obj = obj.detach().cpu().numpy()
+    if isinstance(obj, np.ndarray):
+        if obj.nbytes >= SHARED_MEMORY_MIN_BYTES:
+            return _to_shared(np.ascontiguousarray(obj))
+        return obj
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(pack(item) for item in obj)
+    if isinstance(obj, dict):
+        return {key: pack(value) for key, value in obj.items()}
+    return obj
+
+
+def unpack(obj, unlink=True):
+    """Inverse of pack, frees the shared memory segments it reads unless the sender keeps ownership"""
+    if isinstance(obj, SharedArray):
+        return _from_shared(obj, unlink)
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(unpack(item, unlink) for item in obj)
+    if isinstance(obj, dict):
+        return {key: unpack(value, unlink) for key, value in obj.items()}
+    return obj
+
+
+def shared_refs(obj):
+    """Shared memory references contained in a packed object"""
+    if isinstance(obj, SharedArray):
+        return [obj]
+    if isinstance(obj, (list, tuple)):
+        return [ref for item in obj for ref in shared_refs(item)]
+    if isinstance(obj, dict):
+        return [ref for value in obj.values() for ref in shared_refs(value)]
+    return []
+
+
+def release(obj):
+    """Free the shared memory segments of a packed object that will not be unpacked by the receiver"""
+    for ref in shared_refs(obj):
+        try:
+            shm = SharedMemory(name=ref.name)
+        except FileNotFoundError:
+            continue
+        shm.close()
+        shm.unlink()
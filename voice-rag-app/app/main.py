@@ -9,10 +9,11 @@ import shutil
 from fastapi import FastAPI, File, UploadFile, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse, JSONResponse
+from fastapi.concurrency import run_in_threadpool
 import numpy as np
 import soundfile as sf
 import tempfile
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
 
 # Import our modules
@@ -21,16 +22,35 @@ from app.vector_store import VectorStore
 from app.speech import SpeechProcessor, VoiceActivityDetector
 from app.rag_engine import RAGEngine
 from app.summarizer import Summarizer
+from app.embedding_service import EmbeddingService
+from app.model_client import ModelClient, RemoteModel, RemoteRAGEngine
+from app.ipc import ModelServerBusy
+from app.generation import load_generator
+from app.config import MODEL_SERVER_ADDRESS, MODEL_SERVER_ADDRESSES, LLM_MODEL_NAME, DRAFT_MODEL_NAME
 
 # Create FastAPI app
 app = FastAPI(title="Voice-Interactive RAG System")
 
 # Initialize components
-pdf_processor = PDFProcessor()
+if MODEL_SERVER_ADDRESS:
+    # Models live in the shared model server (app/model_server.py), so each worker stays small
+    clients = {address: ModelClient(address) for address in set(MODEL_SERVER_ADDRESSES.values())}
+    embedding_service = RemoteModel(clients[MODEL_SERVER_ADDRESSES["embedding"]], "embedding")
+    speech_processor = RemoteModel(clients[MODEL_SERVER_ADDRESSES["speech"]], "speech")
+    rag_engine = RemoteRAGEngine(
+        clients[MODEL_SERVER_ADDRESSES["embedding"]],
+        clients[MODEL_SERVER_ADDRESSES["rag"]]
+    )
+    summarizer = RemoteModel(clients[MODEL_SERVER_ADDRESSES["summarizer"]], "summarizer")
+else:
+    embedding_service = EmbeddingService()
+    speech_processor = SpeechProcessor()
+    # Answers and summaries share one copy of the LLM
+    generator = load_generator(LLM_MODEL_NAME, DRAFT_MODEL_NAME)
+    rag_engine = RAGEngine(embedding_service=embedding_service, generator=generator)
+    summarizer = Summarizer(generator=generator)
+pdf_processor = PDFProcessor(embedding_service=embedding_service)
 vector_store = VectorStore(persist_directory="./chroma_db")
-speech_processor = SpeechProcessor()
-rag_engine = RAGEngine()
-summarizer = Summarizer()
 vad = VoiceActivityDetector()
 
 # Create directories for uploads and temp files
@@ -45,11 +65,13 @@ class QueryRequest(BaseModel):
     collection_name: str
     query: str
     top_k: int = 5
+    token_budget: Optional[int] = Field(None, gt=0)
 
 class SummaryRequest(BaseModel):
     collection_name: str
     use_full_text: bool = True
     top_k: int = 10
+    token_budget: Optional[int] = Field(None, gt=0)
 
 class TranscriptionResponse(BaseModel):
     text: str
@@ -70,8 +92,9 @@ async def upload_pdf(file: UploadFile = File(...)):
         shutil.copyfileobj(file.file, f)
     
     try:
-        # Process PDF
-        pdf_data = pdf_processor.process_pdf(file_path)
+        # Process PDF (in a worker thread so concurrent embedding calls can be batched).
+        # Model calls below also run in the threadpool, they may be round-trips to the model server.
+        pdf_data = await run_in_threadpool(pdf_processor.process_pdf, file_path)
         
         # Store in vector DB
         vector_store.add_documents(
@@ -81,7 +104,7 @@ async def upload_pdf(file: UploadFile = File(...)):
         )
         
         # Generate a summary of the full document
-        full_summary = summarizer.summarize(pdf_data["text"])
+        full_summary = await run_in_threadpool(summarizer.summarize, pdf_data["text"])
         
         return {
             "status": "success",
@@ -89,6 +112,11 @@ async def upload_pdf(file: UploadFile = File(...)):
             "num_chunks": len(pdf_data["chunks"]),
             "summary": full_summary
         }
+    except ModelServerBusy as e:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         # Clean up on error
         if os.path.exists(file_path):
@@ -99,20 +127,24 @@ async def upload_pdf(file: UploadFile = File(...)):
 @app.post("/query", response_model=dict)
 async def process_query(request: QueryRequest):
     try:
-        # Process query through RAG pipeline
-        result = rag_engine.process_query(
+        # Process query through RAG pipeline (off the event loop, like PDF processing)
+        result = await run_in_threadpool(
+            rag_engine.process_query,
             query=request.query,
             vector_store=vector_store,
             collection_name=request.collection_name,
-            top_k=request.top_k
+            top_k=request.top_k,
+            token_budget=request.token_budget
         )
         
         # Generate audio response
         audio_path = f"temp/response_{uuid.uuid4().hex[:8]}.wav"
-        speech_processor.text_to_speech(result["answer"], output_path=audio_path)
+        await run_in_threadpool(speech_processor.text_to_speech, result["answer"], output_path=audio_path)
         
         result["audio_path"] = audio_path
         return result
+    except ModelServerBusy as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing query: {str(e)}")
 
@@ -127,10 +159,10 @@ async def generate_summary(request: SummaryRequest):
             pdf_path = f"uploads/{request.collection_name}.pdf"
             
             # Extract text
-            full_text = pdf_processor.extract_text_from_pdf(pdf_path)
+            full_text = await run_in_threadpool(pdf_processor.extract_text_from_pdf, pdf_path)
             
             # Generate summary
-            summary = summarizer.summarize(full_text)
+            summary = await run_in_threadpool(summarizer.summarize, full_text, token_budget=request.token_budget)
         else:
             # Get all chunks
             all_documents = collection.get()["documents"]
@@ -140,19 +172,38 @@ async def generate_summary(request: SummaryRequest):
             chunks_to_summarize = all_documents[:request.top_k]
             
             # Generate summary
-            summary = summarizer.summarize_chunks(chunks_to_summarize)
+            summary = await run_in_threadpool(
+                summarizer.summarize_chunks,
+                chunks_to_summarize,
+                token_budget=request.token_budget
+            )
         
         # Generate audio for summary
         audio_path = f"temp/summary_{uuid.uuid4().hex[:8]}.wav"
-        speech_processor.text_to_speech(summary, output_path=audio_path)
+        await run_in_threadpool(speech_processor.text_to_speech, summary, output_path=audio_path)
         
         return {
             "summary": summary,
             "audio_path": audio_path
         }
+    except ModelServerBusy as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating summary: {str(e)}")
 
+@app.get("/generation-stats", response_model=dict)
+async def generation_stats():
+    # Decode throughput and draft acceptance rate per endpoint
+    return {
+        "answer": await run_in_threadpool(rag_engine.generation_stats),
+        "summary": await run_in_threadpool(summarizer.generation_stats)
+    }
+
+@app.get("/embedding-stats", response_model=dict)
+async def embedding_stats():
+    # Throughput, p99 latency and cache hit rate of the active embedding backend
+    return await run_in_threadpool(embedding_service.summary)
+
 @app.post("/transcribe-audio", response_model=TranscriptionResponse)
 async def transcribe_audio(file: UploadFile = File(...)):
     # Save uploaded audio file
@@ -162,9 +213,11 @@ async def transcribe_audio(file: UploadFile = File(...)):
     
     try:
         # Transcribe audio
-        transcription = speech_processor.transcribe_audio(audio_file_path=temp_audio_path)
+        transcription = await run_in_threadpool(speech_processor.transcribe_audio, audio_file_path=temp_audio_path)
         
         return {"text": transcription}
+    except ModelServerBusy as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error transcribing audio: {str(e)}")
     finally:
@@ -202,7 +255,8 @@ async def websocket_audio(websocket: WebSocket):
                 
                 if speech_segments:
                     # Transcribe the audio
-                    transcription = speech_processor.transcribe_audio(
+                    transcription = await run_in_threadpool(
+                        speech_processor.transcribe_audio,
                         audio_array=audio_data,
                         sample_rate=sample_rate
                     )
@@ -0,0 +1,96 @@
+# app/model_client.py
+import threading
+from multiprocessing.connection import Client
+
+from app.config import MODEL_SERVER_AUTHKEY
+from app.ipc import ModelServerBusy, pack, unpack, release
+from app.rag_engine import RAGEngine
+
+
+class ModelClient:
+    """Calls models hosted by app.model_server, one connection per API worker thread"""
+
+    def __init__(self, address):
+        if not MODEL_SERVER_AUTHKEY:
+            raise RuntimeError("MODEL_SERVER_AUTHKEY must be set when MODEL_SERVER_ADDRESS is used")
+        self.address = address
+        self.local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = Client(self.address, family="AF_UNIX", authkey=MODEL_SERVER_AUTHKEY)
+            self.local.conn = conn
+        return conn
+
+    def _reset(self, conn):
+        # Server restarted or went away, reconnect on the next call
+        conn.close()
+        self.local.conn = None
+
+    def call(self, model, method, *args, **kwargs):
+        """Run model.method(*args, **kwargs) on the model server"""
+        conn = self._connection()
+        packed_args, packed_kwargs = pack(args), pack(kwargs)
+        try:
+            conn.send((model, method, packed_args, packed_kwargs))
+        except (EOFError, OSError):
+            # The server never received the arrays, so free them here
+            release((packed_args, packed_kwargs))
+            self._reset(conn)
+            raise
+
+        try:
+            status, result, needs_ack = conn.recv()
+            try:
+                if status == "ok":
+                    # The server frees shared memory results once we acknowledge the copy
+                    result = unpack(result, unlink=False)
+            finally:
+                if needs_ack:
+                    conn.send("ack")
+        except (EOFError, OSError):
+            self._reset(conn)
+            raise
+
+        if status == "busy":
+            raise ModelServerBusy(result)
+        if status == "error":
+            raise RuntimeError(result)
+        return result
+
+
+class RemoteModel:
+    """Stand-in for a model component whose methods run on the model server"""
+
+    def __init__(self, client, model):
+        self.client = client
+        self.model = model
+
+    def __getattr__(self, method):
+        def call(*args, **kwargs):
+            return self.client.call(self.model, method, *args, **kwargs)
+        return call
+
+
+class RemoteRAGEngine:
+    """
+    RAGEngine whose embedding and generation run on the model server.
+    Retrieval stays in the API worker, next to the vector store.
+    """
+
+    def __init__(self, embedding_client, rag_client):
+        self.embedding = RemoteModel(embedding_client, "embedding")
+        self.rag = RemoteModel(rag_client, "rag")
+
+    def embed_query(self, query):
+        return self.embedding.embed_query(query)
+
+    def generate_answer(self, query, retrieved_contexts, token_budget=None):
+        return self.rag.generate_answer(query, retrieved_contexts, token_budget=token_budget)
+
+    def generation_stats(self):
+        return self.rag.generation_stats()
+
+    # Same pipeline as the in-process engine
+    process_query = RAGEngine.process_query
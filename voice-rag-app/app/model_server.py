@@ -0,0 +1,182 @@
+# app/model_server.py
+#
+# Holds Whisper, MiniLM and Llama in one process so uvicorn can run many API workers:
+#   MODEL_SERVER_AUTHKEY=<secret> python -m app.model_server --address /tmp/voice-rag-models.sock
+#   MODEL_SERVER_AUTHKEY=<secret> MODEL_SERVER_ADDRESS=/tmp/voice-rag-models.sock uvicorn app.main:app --workers 8
+# Run it from the app directory, it reads and writes the same uploads/ and temp/ paths.
+# Both sides need the same MODEL_SERVER_AUTHKEY and must run as the same user (the socket is 0600).
+import os
+import stat
+import queue
+import socket
+import argparse
+import threading
+from concurrent.futures import Future
+from multiprocessing.connection import Listener
+
+from app.config import (
+    LLM_MODEL_NAME,
+    DRAFT_MODEL_NAME,
+    MODEL_NAMES,
+    MODEL_QUEUE_SIZES,
+    MODEL_WORKERS,
+    MODEL_SERVER_AUTHKEY,
+)
+from app.ipc import pack, unpack, shared_refs, release
+
+# Cheap stats methods answered directly, without waiting behind queued model calls
+DIRECT_METHODS = {"summary", "generation_stats"}
+
+# Methods API workers may call on each model
+MODEL_METHODS = {
+    "embedding": {"embed_query", "embed_documents", "summary"},
+    "rag": {"generate_answer", "generation_stats"},
+    "summarizer": {"summarize", "summarize_chunks", "generation_stats"},
+    "speech": {"transcribe_audio", "text_to_speech"},
+}
+
+
+def load_models(names):
+    """Create the requested model components"""
+    models = {}
+    if "embedding" in names:
+        from app.embedding_service import EmbeddingService
+        models["embedding"] = EmbeddingService()
+    if "rag" in names or "summarizer" in names:
+        # One copy of the LLM and draft model serves both answers and summaries
+        from app.generation import load_generator
+        generator = load_generator(LLM_MODEL_NAME, DRAFT_MODEL_NAME)
+    if "rag" in names:
+        # Query embeddings go to the embedding model, this engine only generates
+        from app.rag_engine import RAGEngine
+        models["rag"] = RAGEngine(embedding_service=models.get("embedding"), generator=generator)
+    if "summarizer" in names:
+        from app.summarizer import Summarizer
+        models["summarizer"] = Summarizer(generator=generator)
+    if "speech" in names:
+        from app.speech import SpeechProcessor
+        models["speech"] = SpeechProcessor()
+    return models
+
+
+class ModelServer:
+    """
+    Serves model calls over a Unix socket.
+    Each model has a bounded queue drained by its own worker threads,
+    a full queue is reported back to the caller instead of waiting.
+    """
+
+    def __init__(self, address, models):
+        self.address = address
+        self.models = models
+        self.queues = {name: queue.Queue(maxsize=MODEL_QUEUE_SIZES[name]) for name in models}
+
+        for name in models:
+            for _ in range(MODEL_WORKERS[name]):
+                threading.Thread(target=self._run_worker, args=(name,), daemon=True).start()
+
+    def _run_worker(self, name):
+        model = self.models[name]
+        while True:
+            method, args, kwargs, future = self.queues[name].get()
+            try:
+                future.set_result(getattr(model, method)(*args, **kwargs))
+            except Exception as e:
+                future.set_exception(e)
+
+    def _handle_connection(self, conn):
+        """Answer requests from one API worker connection until it closes"""
+        try:
+            while True:
+                name, method, args, kwargs = conn.recv()
+
+                # Read shared memory arguments right away so rejected calls do not leak segments
+                args, kwargs = unpack(args), unpack(kwargs)
+
+                if name not in self.models or method not in MODEL_METHODS[name]:
+                    conn.send(("error", f"Unknown model method: {name}.{method}", False))
+                    continue
+
+                if method in DIRECT_METHODS:
+                    conn.send(("ok", getattr(self.models[name], method)(), False))
+                    continue
+
+                future = Future()
+                try:
+                    self.queues[name].put_nowait((method, args, kwargs, future))
+                except queue.Full:
+                    conn.send(("busy", f"Model '{name}' is at capacity, try again later", False))
+                    continue
+
+                try:
+                    result = pack(future.result())
+                except Exception as e:
+                    conn.send(("error", str(e), False))
+                    continue
+
+                # Keep shared memory results alive until the client acknowledges it copied them,
+                # and free them even if the client disconnects first
+                needs_ack = bool(shared_refs(result))
+                try:
+                    conn.send(("ok", result, needs_ack))
+                    if needs_ack:
+                        conn.recv()
+                finally:
+                    release(result)
+        except (EOFError, OSError):
+            pass
+        finally:
+            conn.close()
+
+    def _remove_stale_socket(self):
+        """Remove a socket left behind by a dead server, refuse to replace anything else"""
+        if not os.path.exists(self.address):
+            return
+        if not stat.S_ISSOCK(os.stat(self.address).st_mode):
+            raise RuntimeError(f"{self.address} exists and is not a socket")
+
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            try:
+                sock.connect(self.address)
+            except OSError:
+                os.remove(self.address)
+                return
+        raise RuntimeError(f"Another model server is already listening on {self.address}")
+
+    def serve_forever(self):
+        if not MODEL_SERVER_AUTHKEY:
+            raise RuntimeError("MODEL_SERVER_AUTHKEY must be set to run the model server")
+
+        self._remove_stale_socket()
+
+        # Create the socket readable and writable by the owner only
+        old_umask = os.umask(0o177)
+        try:
+            listener = Listener(self.address, family="AF_UNIX", authkey=MODEL_SERVER_AUTHKEY)
+        finally:
+            os.umask(old_umask)
+        os.chmod(self.address, 0o600)
+
+        with listener:
+            print(f"Model server listening on {self.address} with models: {', '.join(self.models)}")
+            while True:
+                try:
+                    conn = listener.accept()
+                except Exception as e:
+                    print(f"Error accepting model client: {str(e)}")
+                    continue
+                threading.Thread(target=self._handle_connection, args=(conn,), daemon=True).start()
+
+
+# Run the model server
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Shared model server for the voice RAG API workers")
+    parser.add_argument("--address", default="/tmp/voice-rag-models.sock", help="Unix socket path")
+    parser.add_argument("--models", default=",".join(MODEL_NAMES), help="Comma separated models to host")
+    cli_args = parser.parse_args()
+    if not MODEL_SERVER_AUTHKEY:
+        # Fail before spending minutes loading models
+        parser.error("MODEL_SERVER_AUTHKEY must be set")
+
+    server = ModelServer(cli_args.address, load_models(cli_args.models.split(",")))
+    server.serve_forever()
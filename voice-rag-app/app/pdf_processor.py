@@ -1,12 +1,20 @@
 import os
+import threading
 import fitz  # PyMuPDF
 import numpy as np
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from sentence_transformers import SentenceTransformer
+
+from app.config import EMBEDDING_MODEL_NAME
+from app.embedding_service import EmbeddingService
+from app.ipc import ModelServerBusy
+
+# PyMuPDF is not thread-safe, PDF parsing in threadpool workers goes through this lock
+FITZ_LOCK = threading.Lock()
 
 class PDFProcessor:
-    def __init__(self, embedding_model_name="all-MiniLM-L6-v2"):
-        self.embedding_model = SentenceTransformer(embedding_model_name)
+    def __init__(self, embedding_model_name=EMBEDDING_MODEL_NAME, embedding_service=None):
+        # main.py passes the shared service so ingestion and queries use one model
+        self.embedding_service = embedding_service or EmbeddingService(embedding_model_name)
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=500,
             chunk_overlap=50,
@@ -19,11 +27,14 @@ class PDFProcessor:
             raise FileNotFoundError(f"PDF file not found: {pdf_path}")
         
         try:
-            doc = fitz.open(pdf_path)
-            text = ""
-            
-            for page in doc:
-                text += page.get_text()
+            with FITZ_LOCK:
+                doc = fitz.open(pdf_path)
+                text = ""
+                
+                for page in doc:
+                    text += page.get_text()
+                
+                doc.close()
             
             return text
         except Exception as e:
@@ -35,7 +46,7 @@ class PDFProcessor:
     
     def create_embeddings(self, chunks):
         """Create embeddings for text chunks"""
-        return self.embedding_model.encode(chunks)
+        return self.embedding_service.embed_documents(chunks)
     
     def process_pdf(self, pdf_path):
         """Process PDF file: extract text, chunk, and create embeddings"""
@@ -54,5 +65,8 @@ class PDFProcessor:
                 "chunks": chunks,
                 "embeddings": embeddings
             }
+        except ModelServerBusy:
+            # Let the API answer 503 instead of a generic processing error
+            raise
         except Exception as e:
             raise Exception(f"Error processing PDF: {str(e)}")
\ No newline at end of file
@@ -1,55 +1,51 @@
 # app/rag_engine.py
+import threading
 import torch
-from sentence_transformers import SentenceTransformer
-from transformers import AutoTokenizer, AutoModelForCausalLM
+
+from app.config import LLM_MODEL_NAME, DRAFT_MODEL_NAME, EMBEDDING_MODEL_NAME
+from app.generation import load_generator
+from app.embedding_service import EmbeddingService
 
 class RAGEngine:
     def __init__(
         self,
-        embedding_model_name="all-MiniLM-L6-v2",
-        llm_model_name="meta-llama/Llama-2-7b-chat-hf",  # Replace with appropriate model
+        embedding_model_name=EMBEDDING_MODEL_NAME,
+        embedding_service=None,
+        llm_model_name=LLM_MODEL_NAME,
+        draft_model_name=DRAFT_MODEL_NAME,
+        generator=None,
         device="cuda" if torch.cuda.is_available() else "cpu"
     ):
-        self.embedding_model = SentenceTransformer(embedding_model_name)
+        # Batched, cached query embeddings, created on first use when not given
+        # (the model server routes query embeddings elsewhere and never needs one here)
+        self.embedding_model_name = embedding_model_name
+        self.embedding_service = embedding_service
+        self.embedding_lock = threading.Lock()
         self.device = device
         
-        # Initialize LLM
-        self.tokenizer = AutoTokenizer.from_pretrained(llm_model_name)
-        self.model = AutoModelForCausalLM.from_pretrained(
-            llm_model_name,
-            torch_dtype=torch.float16 if device == "cuda" else torch.float32,
-            device_map="auto"
-        )
+        # Initialize LLM, or reuse one already loaded for the Summarizer
+        self.generator = generator or load_generator(llm_model_name, draft_model_name, device)
+        self.tokenizer = self.generator.tokenizer
+        self.model = self.generator.model
     
     def embed_query(self, query):
         """Create embedding for query"""
-        return self.embedding_model.encode(query)
+        with self.embedding_lock:
+            if self.embedding_service is None:
+                self.embedding_service = EmbeddingService(self.embedding_model_name)
+        return self.embedding_service.embed_query(query)
     
-    def generate_answer(self, query, retrieved_contexts, max_new_tokens=512):
-        """Generate answer using LLM"""
+    def generate_answer(self, query, retrieved_contexts, token_budget=None):
+        """Generate a short spoken answer using LLM, returns (answer, generation stats)"""
         # Construct prompt
         prompt = self._construct_prompt(query, retrieved_contexts)
         
-        # Tokenize prompt
-        inputs = self.tokenizer(prompt, return_tensors="pt").to(self.device)
-        
-        # Generate answer
-        with torch.no_grad():
-            output = self.model.generate(
-                **inputs,
-                max_new_tokens=max_new_tokens,
-                temperature=0.7,
-                do_sample=True,
-                top_p=0.95,
-            )
-        
-        # Decode answer
-        answer = self.tokenizer.decode(output[0], skip_special_tokens=True)
-        
-        # Extract only the answer part (removing the prompt)
-        answer = answer[len(prompt):].strip()
-        
-        return answer
+        # Generate answer with the voice answer limits
+        return self.generator.generate(prompt, profile="answer", token_budget=token_budget)
+    
+    def generation_stats(self):
+        """Decode throughput and draft acceptance rate so far"""
+        return self.generator.stats["answer"].summary()
     
     def _construct_prompt(self, query, retrieved_contexts):
         """Construct prompt for LLM"""
@@ -71,7 +67,7 @@ Based on these contexts, please answer the following question:
 """
         return prompt
 
-    def process_query(self, query, vector_store, collection_name, top_k=5):
+    def process_query(self, query, vector_store, collection_name, top_k=5, token_budget=None):
         """
         Process query through the RAG pipeline:
         1. Embed query
@@ -89,14 +85,16 @@ Based on these contexts, please answer the following question:
         )
         
         # Generate answer
-        answer = self.generate_answer(
+        answer, generation_stats = self.generate_answer(
             query=query,
-            retrieved_contexts=search_results["documents"]
+            retrieved_contexts=search_results["documents"],
+            token_budget=token_budget
         )
         
         return {
             "query": query,
             "answer": answer,
             "retrieved_chunks": search_results["documents"],
-            "chunk_ids": search_results["ids"]
+            "chunk_ids": search_results["ids"],
+            "generation_stats": generation_stats
         }
\ No newline at end of file
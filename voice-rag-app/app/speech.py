@@ -14,8 +14,9 @@ class SpeechProcessor:
         self.whisper_processor = WhisperProcessor.from_pretrained(whisper_model)
         self.whisper_model = WhisperForConditionalGeneration.from_pretrained(whisper_model)
         
-        # Initialize pyttsx3 for TTS
+        # Initialize pyttsx3 for TTS (not thread-safe, calls are serialized by tts_lock)
         self.tts_engine = pyttsx3.init()
+        self.tts_lock = threading.Lock()
         # Configure properties (optional)
         self.tts_engine.setProperty('rate', 150)  # Speed of speech
         self.tts_engine.setProperty('volume', 0.9)  # Volume (0.0 to 1.0)
@@ -72,8 +73,9 @@ class SpeechProcessor:
         if not output_path:
             # Just play the text without saving
             def speak_text():
-                self.tts_engine.say(text)
-                self.tts_engine.runAndWait()
+                with self.tts_lock:
+                    self.tts_engine.say(text)
+                    self.tts_engine.runAndWait()
             
             # Run in a separate thread to avoid blocking
             thread = threading.Thread(target=speak_text)
@@ -91,8 +93,9 @@ class SpeechProcessor:
                 temp_path = output_path
             
             # Save speech to file
-            self.tts_engine.save_to_file(text, temp_path)
-            self.tts_engine.runAndWait()
+            with self.tts_lock:
+                self.tts_engine.save_to_file(text, temp_path)
+                self.tts_engine.runAndWait()
             
             # If using temp file, convert format if needed
             if temp_file:
@@ -1,22 +1,27 @@
 # app/summarizer.py
 import torch
-from transformers import AutoTokenizer, AutoModelForCausalLM
+
+from app.config import LLM_MODEL_NAME, DRAFT_MODEL_NAME
+from app.generation import load_generator
 
 class Summarizer:
     def __init__(
         self,
-        model_name="meta-llama/Llama-2-7b-chat-hf",  # Replace with appropriate model
+        model_name=LLM_MODEL_NAME,
+        draft_model_name=DRAFT_MODEL_NAME,
+        generator=None,
         device="cuda" if torch.cuda.is_available() else "cpu"
     ):
         self.device = device
         
-        # Initialize LLM
-        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
-        self.model = AutoModelForCausalLM.from_pretrained(
-            model_name,
-            torch_dtype=torch.float16 if device == "cuda" else torch.float32,
-            device_map="auto"
-        )
+        # Initialize LLM, or reuse the RAGEngine's
+        self.generator = generator or load_generator(model_name, draft_model_name, device)
+        self.tokenizer = self.generator.tokenizer
+        self.model = self.generator.model
+    
+    def generation_stats(self):
+        """Decode throughput and draft acceptance rate so far"""
+        return self.generator.stats["summary"].summary()
     
     def _chunk_long_text(self, text, max_chunk_size=3000):
         """Split long text into chunks for processing"""
@@ -51,32 +56,16 @@ Provide a well-structured summary that covers the main points, key findings, and
 """
         return prompt
     
-    def _summarize_chunk(self, chunk, max_new_tokens=512):
+    def _summarize_chunk(self, chunk, token_budget=None):
         """Summarize a single chunk"""
         prompt = self._construct_summary_prompt(chunk)
         
-        # Tokenize prompt
-        inputs = self.tokenizer(prompt, return_tensors="pt").to(self.device)
-        
-        # Generate summary
-        with torch.no_grad():
-            output = self.model.generate(
-                **inputs,
-                max_new_tokens=max_new_tokens,
-                temperature=0.7,
-                do_sample=True,
-                top_p=0.95,
-            )
-        
-        # Decode summary
-        summary = self.tokenizer.decode(output[0], skip_special_tokens=True)
-        
-        # Extract only the summary part (removing the prompt)
-        summary = summary[len(prompt):].strip()
+        # Generate summary with the summary limits
+        summary, _ = self.generator.generate(prompt, profile="summary", token_budget=token_budget)
         
         return summary
     
-    def summarize(self, text, max_new_tokens=512):
+    def summarize(self, text, token_budget=None):
         """
         Generate abstractive summary of text
         For long texts, chunks the text and summarizes each chunk
@@ -86,23 +75,23 @@ Provide a well-structured summary that covers the main points, key findings, and
             # Chunk the text
             chunks = self._chunk_long_text(text)
             
-            # Summarize each chunk
-            chunk_summaries = [self._summarize_chunk(chunk) for chunk in chunks]
+            # Summarize each chunk, the budget caps every generation of the request
+            chunk_summaries = [self._summarize_chunk(chunk, token_budget) for chunk in chunks]
             
             # Combine chunk summaries
             combined_summary = " ".join(chunk_summaries)
             
             # Create final summary of summaries
-            final_summary = self._summarize_chunk(combined_summary)
+            final_summary = self._summarize_chunk(combined_summary, token_budget)
             return final_summary
         else:
             # Summarize directly
-            return self._summarize_chunk(text, max_new_tokens)
+            return self._summarize_chunk(text, token_budget)
     
-    def summarize_chunks(self, chunks, max_new_tokens=512):
+    def summarize_chunks(self, chunks, token_budget=None):
         """Summarize a set of retrieved chunks"""
         # Combine chunks into a single text
         combined_text = "\n\n".join(chunks)
         
         # Generate summary
-        return self.summarize(combined_text, max_new_tokens)
\ No newline at end of file
+        return self.summarize(combined_text, token_budget)
\ No newline at end of file